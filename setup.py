@@ -53,6 +53,9 @@ setup(
         'scipy',
         'scikit-image',
     ],
+    extras_require={
+        'numba': ['numba'],
+    },
     keywords="photoshop psd pil pillow",
     package_dir={'': 'src'},
     packages=find_packages('src'),
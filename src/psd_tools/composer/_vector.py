@@ -0,0 +1,213 @@
+"""
+Numba-compiled kernels for the vector module.
+
+Importing this module raises ImportError when numba is not available, in which
+case :py:mod:`psd_tools.composer.vector` falls back to plain numpy.
+"""
+from __future__ import absolute_import, unicode_literals
+import math
+
+import numpy as np
+
+from numba import njit
+
+from psd_tools.terminology import Enum
+
+# Fast-math flags except 'contract': fused multiply-add would shift pixel
+# coordinates off the exact `np.linspace` samples, and flip the seam of angle
+# gradients.
+_FASTMATH = {'nnan', 'ninf', 'nsz', 'arcp', 'afn', 'reassoc'}
+
+# Gradient kernels are not compiled with parallel=True: they run on small
+# tiles, and numba's fallback workqueue threading layer aborts the process
+# when called concurrently from several Python threads.
+
+
+@njit(inline='always')
+def _quantize(v, reverse):
+    if v < 0.:
+        v = 0.
+    elif v > 1.:
+        v = 1.
+    if reverse:
+        v = 1. - v
+    return int(255 * v)
+
+
+@njit(fastmath=_FASTMATH, cache=True)
+def linear_gradient(Z, x0, dx, y0, dy, top, angle, reverse):
+    """
+    Fills uint8 Z with the index map of linear gradients.
+
+    Z receives the rows from `top` of the map sampled at (x0 + j * dx,
+    y0 + i * dy), so that tiles compute the same values as the whole map.
+    """
+    theta = math.radians(angle % 360)
+    cos_t, sin_t = math.cos(theta), math.sin(theta)
+    for i in range(Z.shape[0]):
+        y = y0 + (top + i) * dy
+        for j in range(Z.shape[1]):
+            x = x0 + j * dx
+            Z[i, j] = _quantize(.5 * (cos_t * x - sin_t * y + 1), reverse)
+
+
+@njit(fastmath=_FASTMATH, cache=True)
+def radial_gradient(Z, x0, dx, y0, dy, top, angle, reverse):
+    """Fills uint8 Z with the index map of radial gradients."""
+    for i in range(Z.shape[0]):
+        y = y0 + (top + i) * dy
+        for j in range(Z.shape[1]):
+            x = x0 + j * dx
+            Z[i, j] = _quantize(math.sqrt(x * x + y * y), reverse)
+
+
+@njit(fastmath=_FASTMATH, cache=True)
+def angle_gradient(Z, x0, dx, y0, dy, top, angle, reverse):
+    """Fills uint8 Z with the index map of angle gradients."""
+    for i in range(Z.shape[0]):
+        y = y0 + (top + i) * dy
+        for j in range(Z.shape[1]):
+            x = x0 + j * dx
+            v = (((180 * math.atan2(y, x) / math.pi) + angle) % 360) / 360
+            Z[i, j] = _quantize(v, reverse)
+
+
+@njit(fastmath=_FASTMATH, cache=True)
+def reflected_gradient(Z, x0, dx, y0, dy, top, angle, reverse):
+    """Fills uint8 Z with the index map of reflected gradients."""
+    theta = math.radians(angle % 360)
+    cos_t, sin_t = math.cos(theta), math.sin(theta)
+    for i in range(Z.shape[0]):
+        y = y0 + (top + i) * dy
+        for j in range(Z.shape[1]):
+            x = x0 + j * dx
+            Z[i, j] = _quantize(abs(cos_t * x - sin_t * y), reverse)
+
+
+@njit(fastmath=_FASTMATH, cache=True)
+def diamond_gradient(Z, x0, dx, y0, dy, top, angle, reverse):
+    """Fills uint8 Z with the index map of diamond gradients."""
+    theta = math.radians(angle % 360)
+    cos_t, sin_t = math.cos(theta), math.sin(theta)
+    for i in range(Z.shape[0]):
+        y = y0 + (top + i) * dy
+        for j in range(Z.shape[1]):
+            x = x0 + j * dx
+            v = abs(cos_t * x - sin_t * y) + abs(sin_t * x + cos_t * y)
+            Z[i, j] = _quantize(v, reverse)
+
+
+GRADIENTS = {
+    Enum.Linear: linear_gradient,
+    Enum.Radial: radial_gradient,
+    Enum.Angle: angle_gradient,
+    Enum.Reflected: reflected_gradient,
+    Enum.Diamond: diamond_gradient,
+}
+
+
+@njit(cache=True)
+def _accumulate_segment(acc, x0, y0, x1, y1):
+    """Accumulates signed area of a line within 0 <= x <= width."""
+    if y0 == y1:
+        return
+    if y0 < y1:
+        direction = 1.
+    else:
+        direction = -1.
+        x0, y0, x1, y1 = x1, y1, x0, y0
+    dxdy = (x1 - x0) / (y1 - y0)
+    top = max(0., y0)
+    x = x0 + (top - y0) * dxdy
+    for y in range(int(top), min(acc.shape[0], int(math.ceil(y1)))):
+        dy = min(y + 1., y1) - max(float(y), y0)
+        x_next = x + dxdy * dy
+        d = dy * direction
+        left, right = min(x, x_next), max(x, x_next)
+        left_i = int(math.floor(left))
+        right_i = int(math.ceil(right))
+        if right_i <= left_i + 1:
+            xm = .5 * (x + x_next) - left_i
+            acc[y, left_i] += d - d * xm
+            acc[y, left_i + 1] += d * xm
+        else:
+            s = 1. / (right - left)
+            left_f = left - left_i
+            a0 = .5 * s * (1. - left_f)**2
+            right_f = right - right_i + 1.
+            am = .5 * s * right_f**2
+            acc[y, left_i] += d * a0
+            if right_i == left_i + 2:
+                acc[y, left_i + 1] += d * (1. - a0 - am)
+            else:
+                a1 = s * (1.5 - left_f)
+                acc[y, left_i + 1] += d * (a1 - a0)
+                for i in range(left_i + 2, right_i - 1):
+                    acc[y, i] += d * s
+                a2 = a1 + (right_i - left_i - 3) * s
+                acc[y, right_i - 1] += d * (1. - a2 - am)
+            acc[y, right_i] += d * am
+        x = x_next
+
+
+@njit(cache=True)
+def _accumulate_line(acc, x0, y0, x1, y1):
+    """Accumulates a line, clamping the parts beyond left and right edges."""
+    width = acc.shape[1] - 2.
+    # Split at the crossings with both edges, in order along the line.
+    t_left = t_right = 1.
+    if x0 != x1:
+        t_left = min(max(-x0 / (x1 - x0), 0.), 1.)
+        t_right = min(max((width - x0) / (x1 - x0), 0.), 1.)
+    x, y = min(max(x0, 0.), width), y0
+    for t in (min(t_left, t_right), max(t_left, t_right), 1.):
+        x_next = min(max(x0 + t * (x1 - x0), 0.), width)
+        y_next = y0 + t * (y1 - y0)
+        _accumulate_segment(acc, x, y, x_next, y_next)
+        x, y = x_next, y_next
+
+
+@njit(cache=True)
+def _flatten_bezier(acc, p0, p1, p2, p3, tolerance):
+    """Accumulates a cubic Bezier curve as line segments."""
+    # Wang's formula for the number of segments within tolerance.
+    ddx = max(abs(p0[0] - 2 * p1[0] + p2[0]), abs(p1[0] - 2 * p2[0] + p3[0]))
+    ddy = max(abs(p0[1] - 2 * p1[1] + p2[1]), abs(p1[1] - 2 * p2[1] + p3[1]))
+    n = int(math.ceil(math.sqrt(.75 * math.hypot(ddx, ddy) / tolerance)))
+    n = max(1, n)
+    x, y = p0[0], p0[1]
+    for k in range(1, n + 1):
+        t = k / n
+        u = 1. - t
+        a, b, c, e = u * u * u, 3 * u * u * t, 3 * u * t * t, t * t * t
+        x_next = a * p0[0] + b * p1[0] + c * p2[0] + e * p3[0]
+        y_next = a * p0[1] + b * p1[1] + c * p2[1] + e * p3[1]
+        _accumulate_line(acc, x, y, x_next, y_next)
+        x, y = x_next, y_next
+
+
+@njit(cache=True)
+def fill_path(out, knots, closed, tolerance=.05):
+    """
+    Fills the path into uint8 out with anti-aliasing and the non-zero rule.
+
+    :param knots: (N, 3, 2) array of (preceding, anchor, leaving) points in
+        pixel coordinates of out.
+    """
+    height, width = out.shape
+    acc = np.zeros((height, width + 2))
+    n = knots.shape[0]
+    for i in range(n if closed else n - 1):
+        p1, p2 = knots[i], knots[(i + 1) % n]
+        _flatten_bezier(acc, p1[1], p1[2], p2[0], p2[1], tolerance)
+    if not closed:
+        # Filling implicitly closes the path.
+        _accumulate_line(
+            acc, knots[n - 1, 1, 0], knots[n - 1, 1, 1], knots[0, 1, 0],
+            knots[0, 1, 1]
+        )
+    for y in range(height):
+        cover = 0.
+        for x in range(width):
+            cover += acc[y, x]
+            out[y, x] = int(min(1., abs(cover)) * 255 + .5)
@@ -2,13 +2,37 @@
 Vector module.
 """
 from __future__ import absolute_import, unicode_literals
+import functools
 import logging
+import math
+import threading
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw
 
 from psd_tools.api.pil_io import convert_pattern_to_pil
+from psd_tools.composer.blend import blend
 from psd_tools.terminology import Enum, Key, Type, Klass
+try:
+    from psd_tools.composer import _vector
+except ImportError:
+    _vector = None
+try:
+    import aggdraw
+except ImportError:
+    aggdraw = None
 
 logger = logging.getLogger(__name__)
 
+_SCRATCH = threading.local()
+
+# Pixels per tile of gradient fills: 256 KiB of float32, about an L2 cache.
+_TILE_PIXELS = 1 << 16
+
+_GRADIENT_KINDS = (
+    Enum.Linear, Enum.Radial, Enum.Angle, Enum.Reflected, Enum.Diamond
+)
+
 _COLORSPACE = {
     Klass.CMYKColor: 'CMYK',
     Klass.RGBColor: 'RGB',
@@ -18,38 +42,76 @@ _COLORSPACE = {
 
 
 def draw_vector_mask(layer, bbox=None):
-    from PIL import Image, ImageChops
     width = layer._psd.width
     height = layer._psd.height
     color = 255 * layer.vector_mask.initial_fill_rule
 
-    mask = Image.new('L', (width, height), color)
+    # Only the part of the requested box inside the canvas is rasterized.
+    bbox = bbox or layer.bbox
+    area = _clip_bbox(bbox, (0, 0, width, height))
+    mask = np.full((area[3] - area[1], area[2] - area[0]), color, np.uint8)
     first = True
     for subpath in layer.vector_mask.paths:
-        plane = _draw_subpath(subpath, width, height)
+        if first and subpath.operation in (2, -1, 3):
+            np.subtract(255, mask, out=mask)
+        box = _clip_bbox(_get_subpath_bbox(subpath, width, height), area)
+        plane = _draw_subpath(subpath, width, height, box)
+        region = mask[box[1] - area[1]:box[3] - area[1],
+                      box[0] - area[0]:box[2] - area[0]]
         if subpath.operation == 0:
-            mask = ImageChops.difference(mask, plane)
+            # Absolute difference without leaving uint8.
+            lower = np.minimum(region, plane)
+            np.maximum(region, plane, out=region)
+            region -= lower
         elif subpath.operation == 1:
-            mask = ImageChops.lighter(mask, plane)
+            np.maximum(region, plane, out=region)
         elif subpath.operation in (2, -1):
-            if first:
-                mask = ImageChops.invert(mask)
-            mask = ImageChops.subtract(mask, plane)
+            region -= np.minimum(region, plane)
         elif subpath.operation == 3:
-            if first:
-                mask = ImageChops.invert(mask)
-            mask = ImageChops.darker(mask, plane)
+            np.minimum(region, plane, out=region)
+            intersection = region.copy()
+            mask[:] = 0
+            region[:] = intersection
         first = False
 
-    mask = mask.crop(bbox or layer.bbox)
+    if area != tuple(bbox):
+        canvas = np.zeros((bbox[3] - bbox[1], bbox[2] - bbox[0]), np.uint8)
+        canvas[area[1] - bbox[1]:area[3] - bbox[1],
+               area[0] - bbox[0]:area[2] - bbox[0]] = mask
+        mask = canvas
+    mask = Image.fromarray(mask)
     mask.info['offset'] = layer.offset
     return mask
 
 
+def _clip_bbox(bbox, area):
+    """Clips bbox to the given area, keeping an empty box inside it."""
+    left = min(max(bbox[0], area[0]), area[2])
+    top = min(max(bbox[1], area[1]), area[3])
+    right = max(min(bbox[2], area[2]), left)
+    bottom = max(min(bbox[3], area[3]), top)
+    return left, top, right, bottom
+
+
+def _get_subpath_bbox(subpath, width, height):
+    """Pixel bbox enclosing all control points, hence the whole curve."""
+    xs = [p[1] for k in subpath for p in (k.preceding, k.anchor, k.leaving)]
+    ys = [p[0] for k in subpath for p in (k.preceding, k.anchor, k.leaving)]
+    if not xs:
+        return 0, 0, 0, 0
+    # One pixel margin for anti-aliased edges.
+    return (
+        int(math.floor(min(xs) * width)) - 1,
+        int(math.floor(min(ys) * height)) - 1,
+        int(math.ceil(max(xs) * width)) + 1,
+        int(math.ceil(max(ys) * height)) + 1,
+    )
+
+
 def draw_stroke(backdrop, layer, vector_mask=None):
-    from PIL import Image, ImageChops
-    import aggdraw
-    from psd_tools.composer.blend import blend
+    if aggdraw is None:
+        logger.error('Stroke requires aggdraw.')
+        return backdrop
     width = layer._psd.width
     height = layer._psd.height
     setting = layer.stroke._data
@@ -59,8 +121,7 @@ def draw_stroke(backdrop, layer, vector_mask=None):
     mask = Image.new('L', (width, height))
     draw = aggdraw.Draw(mask)
     for subpath in layer.vector_mask.paths:
-        path = ' '.join(map(str, _generate_symbol(subpath, width, height)))
-        symbol = aggdraw.Symbol(path)
+        symbol = aggdraw.Symbol(_format_symbol(subpath, width, height))
         pen = aggdraw.Pen(255, int(2 * stroke_width))
         draw.symbol((0, 0), symbol, pen, None)
     draw.flush()
@@ -97,66 +158,86 @@ def draw_stroke(backdrop, layer, vector_mask=None):
     return blend(backdrop, image, (0, 0), mode)
 
 
-def _draw_subpath(subpath, width, height):
-    from PIL import Image
-    import aggdraw
-    mask = Image.new('L', (width, height), 0)
+def _draw_subpath(subpath, width, height, bbox):
+    """Rasterizes the subpath within bbox of the (width, height) canvas."""
+    pixels = np.zeros((bbox[3] - bbox[1], bbox[2] - bbox[0]), dtype=np.uint8)
     if len(subpath) <= 1:
         logger.warning('not enough knots: %d' % len(subpath))
-        return mask
-    path = ' '.join(map(str, _generate_symbol(subpath, width, height)))
+        return pixels
+    if _vector is not None:
+        knots = _get_knots(subpath, width, height, offset=bbox[:2])
+        _vector.fill_path(pixels, knots, subpath.is_closed())
+        return pixels
+    if aggdraw is None:
+        logger.error('Vector mask requires numba or aggdraw.')
+        return pixels
+    mask = Image.fromarray(pixels)
+    path = _format_symbol(subpath, width, height, offset=bbox[:2])
     draw = aggdraw.Draw(mask)
     brush = aggdraw.Brush(255)
     symbol = aggdraw.Symbol(path)
     draw.symbol((0, 0), symbol, None, brush)
     draw.flush()
     del draw
-    return mask
+    return np.asarray(mask)
+
+
+def _format_symbol(path, width, height, offset=(0, 0)):
+    """SVG path string for aggdraw, with coordinates rounded to 1/1000px."""
+    return ' '.join(
+        x if isinstance(x, str) else '%.3f' % x
+        for x in _generate_symbol(path, width, height, offset=offset)
+    )
 
 
-def _generate_symbol(path, width, height, command='C'):
-    """Sequence generator for SVG path."""
+def _get_knots(path, width, height, offset=(0, 0)):
+    """Knots as rows of (preceding, anchor, leaving) points in pixels."""
+    knots = np.array([(p.preceding, p.anchor, p.leaving) for p in path])
+    return knots[:, :, ::-1] * (width, height) - offset
+
+
+def _generate_symbol(path, width, height, command='C', offset=(0, 0)):
+    """Sequence generator for SVG path, with the origin moved to offset."""
     if len(path) == 0:
         return
 
+    knots = _get_knots(path, width, height, offset)
+
     # Initial point.
     yield 'M'
-    yield path[0].anchor[1] * width
-    yield path[0].anchor[0] * height
+    for value in knots[0, 1].tolist():
+        yield value
     yield command
 
     # Closed path or open path
-    points = (
-        zip(path, path[1:] +
-            path[0:1]) if path.is_closed() else zip(path, path[1:])
-    )
+    following = np.roll(knots, -1, axis=0) if path.is_closed() else knots[1:]
 
     # Rest of the points.
-    for p1, p2 in points:
-        yield p1.leaving[1] * width
-        yield p1.leaving[0] * height
-        yield p2.preceding[1] * width
-        yield p2.preceding[0] * height
-        yield p2.anchor[1] * width
-        yield p2.anchor[0] * height
+    segments = np.concatenate(
+        (knots[:len(following), 2], following[:, :2].reshape(-1, 4)), axis=1
+    )
+    for value in segments.ravel().tolist():
+        yield value
 
     if path.is_closed():
         yield 'Z'
 
 
 def _apply_opacity(image, setting):
+    """Applies opacity in place, and returns whether the image is modified."""
     opacity = int(setting.get(Key.Opacity, 100))
-    if opacity != 100:
-        if image.mode.endswith('A'):
-            alpha = image.getchannel('A')
-            alpha = alpha.point(lambda x: int(x * opacity / 100.))
-            image.putalpha(alpha)
-        else:
-            image.putalpha(int(opacity * 2.55))
+    if opacity == 100:
+        return False
+    if image.mode.endswith('A'):
+        alpha = image.getchannel('A')
+        alpha = alpha.point([x * opacity // 100 for x in range(256)])
+        image.putalpha(alpha)
+    else:
+        image.putalpha(255 * opacity // 100)
+    return True
 
 
 def draw_solid_color_fill(size, setting):
-    from PIL import Image, ImageDraw
     color = setting.get(Key.Color)
     mode = _COLORSPACE.get(color.classID)
     fill = tuple(int(x) for x in list(color.values())[:len(mode)])
@@ -176,7 +257,6 @@ def draw_pattern_fill(size, psd, setting):
     :param psd: :py:class:`PSDImage`.
     :param setting: Descriptor containing pattern fill.
     """
-    from PIL import Image
     pattern_id = setting[Enum.Pattern][Key.ID].value.rstrip('\x00')
     pattern = psd._get_pattern(pattern_id)
     if not pattern:
@@ -192,10 +272,15 @@ def draw_pattern_fill(size, psd, setting):
         ))
     _apply_opacity(panel, setting)
 
-    pattern_image = Image.new(panel.mode, size)
-    for top in range(0, pattern_image.height, panel.height):
-        for left in range(0, pattern_image.width, panel.width):
-            pattern_image.paste(panel, (left, top))
+    tile = np.asarray(panel)
+    reps = (
+        -(-size[1] // panel.height),
+        -(-size[0] // panel.width),
+    ) + (1, ) * (tile.ndim - 2)
+    pixels = np.tile(tile, reps)[:size[1], :size[0]]
+    pattern_image = Image.fromarray(pixels, panel.mode)
+    if panel.mode == 'P':
+        pattern_image.putpalette(panel.getpalette())
 
     return pattern_image
 
@@ -207,93 +292,190 @@ def draw_gradient_fill(size, setting):
     :param size: (width, height) tuple.
     :param setting: Descriptor containing pattern fill.
     """
-    try:
-        import numpy as np
-    except ImportError:
-        logger.error('Gradient fill requires numpy and scipy.')
-        return None
-
     angle = float(setting.get(Key.Angle, 0))
     scale = float(setting.get(Key.Scale, 100.)) / 100.
     ratio = (angle % 90)
     scale *= (90. - ratio) / 90. * size[0] + (ratio / 90.) * size[1]
-    X, Y = np.meshgrid(
-        np.linspace(-size[0] / scale, size[0] / scale, size[0]),
-        np.linspace(-size[1] / scale, size[1] / scale, size[1]),
-    )
+    x_range = (-size[0] / scale, size[0] / scale, size[0])
+    y_range = (-size[1] / scale, size[1] / scale, size[1])
+    reverse = bool(setting.get(Key.Reverse, False))
 
     gradient_kind = setting.get(Key.Type).enum
+    if gradient_kind == b'shapeburst':
+        # Only available in stroke effect.
+        logger.warning('Gradient style not supported: %s' % gradient_kind)
+    elif gradient_kind not in _GRADIENT_KINDS:
+        logger.warning('Unknown gradient style: %s.' % (gradient_kind))
+
+    color_map = _make_color_map(setting.get(Key.Gradient))
+    if color_map is None:
+        return None
+    mode, color_lut, alpha_lut = color_map
+    alpha = None
+    # Noise tables may have more bands than the mode, or a color space
+    # without a mode, which only the general path reads back as raw bytes.
+    bands = color_lut.shape[1] if color_lut.ndim > 1 else 1
+    if (
+        gradient_kind == Enum.Linear and angle % 90 == 0 and all(size)
+        and mode is not None and bands == Image.getmodebands(mode)
+    ):
+        # Axis-aligned linear gradients only vary along one axis, so map a
+        # single line and let PIL stretch it.
+        if angle % 180 == 0:
+            shape, y_range = (1, size[0]), (0., 0., 1)
+        else:
+            shape, x_range = (size[1], 1), (0., 0., 1)
+        Z = _get_scratch(shape, np.uint8)
+        _fill_index_map(Z, gradient_kind, x_range, y_range, 0, angle, reverse)
+        gradient_image = Image.fromarray(
+            np.take(color_lut, Z, axis=0), mode
+        ).resize(size, Image.NEAREST)
+        if alpha_lut is not None:
+            alpha = Image.fromarray(np.take(alpha_lut, Z), 'L')
+            alpha = alpha.resize(size, Image.NEAREST)
+    else:
+        pixels = np.empty((size[1], size[0]) + color_lut.shape[1:], np.uint8)
+        if alpha_lut is not None:
+            alpha = np.empty((size[1], size[0]), np.uint8)
+        # Compute and map the index map by row tiles that stay in cache.
+        rows = max(1, _TILE_PIXELS // max(1, size[0]))
+        for top in range(0, size[1], rows):
+            bottom = min(top + rows, size[1])
+            Z = _get_scratch((bottom - top, size[0]), np.uint8)
+            _fill_index_map(
+                Z, gradient_kind, x_range, y_range, top, angle, reverse
+            )
+            np.take(
+                color_lut, Z, axis=0, out=pixels[top:bottom], mode='clip'
+            )
+            if alpha is not None:
+                np.take(alpha_lut, Z, out=alpha[top:bottom], mode='clip')
+        gradient_image = Image.fromarray(pixels, mode)
+        if alpha is not None:
+            alpha = Image.fromarray(alpha, 'L')
+
+    if alpha is not None:
+        gradient_image.putalpha(alpha)
+    _apply_opacity(gradient_image, setting)
+    return gradient_image
+
+
+def _fill_index_map(Z, gradient_kind, x_range, y_range, top, angle, reverse):
+    """Fills uint8 Z with the rows from `top` of the gradient index map."""
+    if _vector is not None and gradient_kind in _vector.GRADIENTS:
+        _vector.GRADIENTS[gradient_kind](
+            Z, x_range[0], _linspace_step(*x_range), y_range[0],
+            _linspace_step(*y_range), top, angle, reverse
+        )
+        return
+    rows = slice(top, top + Z.shape[0])
+    G = _make_gradient(gradient_kind, x_range, y_range, angle, rows)
+    np.clip(G, 0, 1, out=G)
+    if reverse:
+        np.subtract(1, G, out=G)
+    G *= 255
+    Z[...] = G
+
+
+def _get_scratch(shape, dtype):
+    """
+    Thread-local scratch array of the given shape.
+
+    The underlying buffer only grows and is shared by all calls in the thread,
+    so the array must not outlive the caller.
+    """
+    size = shape[0] * shape[1]
+    buffers = getattr(_SCRATCH, 'buffers', None)
+    if buffers is None:
+        buffers = _SCRATCH.buffers = {}
+    buffer = buffers.get(dtype)
+    if buffer is None or buffer.size < size:
+        buffer = buffers[dtype] = np.empty(size, dtype=dtype)
+    return buffer[:size].reshape(shape)
+
+
+def _linspace_step(start, stop, num):
+    """Step size between the samples of `np.linspace(start, stop, num)`."""
+    return (stop - start) / (num - 1) if num > 1 else 0.
+
+
+def _make_gradient(gradient_kind, x_range, y_range, angle, rows=slice(None)):
+    """
+    Generates index map for the given gradient kind with numpy.
+
+    Only the given rows are generated. Unsupported kinds give a flat map.
+    """
+    X, Y = _make_gradient_grid(x_range, y_range)
+    Y = Y[rows]
     if gradient_kind == Enum.Linear:
-        Z = _make_linear_gradient(X, Y, angle)
+        return _make_linear_gradient(X, Y, angle)
     elif gradient_kind == Enum.Radial:
-        Z = _make_radial_gradient(X, Y)
+        return _make_radial_gradient(X, Y)
     elif gradient_kind == Enum.Angle:
-        Z = _make_angle_gradient(X, Y, angle)
+        return _make_angle_gradient(X, Y, angle)
     elif gradient_kind == Enum.Reflected:
-        Z = _make_reflected_gradient(X, Y, angle)
+        return _make_reflected_gradient(X, Y, angle)
     elif gradient_kind == Enum.Diamond:
-        Z = _make_diamond_gradient(X, Y, angle)
-    elif gradient_kind == b'shapeburst':
-        # Only available in stroke effect.
-        logger.warning('Gradient style not supported: %s' % gradient_kind)
-        Z = np.ones((size[1], size[0])) * 0.5
-    else:
-        logger.warning('Unknown gradient style: %s.' % (gradient_kind))
-        Z = np.ones((size[1], size[0])) * 0.5
+        return _make_diamond_gradient(X, Y, angle)
+    return np.full((Y.shape[0], X.shape[1]), 0.5, dtype=np.float32)
 
-    Z = np.maximum(0, np.minimum(1, Z))
-    if bool(setting.get(Key.Reverse, False)):
-        Z = 1 - Z
 
-    gradient_image = _apply_color_map(setting.get(Key.Gradient), Z)
-    _apply_opacity(gradient_image, setting)
-    return gradient_image
+@functools.lru_cache(maxsize=32)
+def _make_gradient_grid(x_range, y_range):
+    """
+    Row and column coordinate vectors for gradient index maps.
+
+    The vectors broadcast to the full map in the gradient expressions. They
+    are cached for layers sharing the same geometry, hence read-only.
+    """
+    X = np.linspace(*x_range, dtype=np.float32).reshape(1, -1)
+    Y = np.linspace(*y_range, dtype=np.float32).reshape(-1, 1)
+    X.setflags(write=False)
+    Y.setflags(write=False)
+    return X, Y
 
 
 def _make_linear_gradient(X, Y, angle):
     """Generates index map for linear gradients."""
-    import numpy as np
-    theta = np.radians(angle % 360)
+    theta = np.float32(np.radians(angle % 360))
     Z = .5 * (np.cos(theta) * X - np.sin(theta) * Y + 1)
     return Z
 
 
 def _make_radial_gradient(X, Y):
     """Generates index map for radial gradients."""
-    import numpy as np
     Z = np.sqrt(np.power(X, 2) + np.power(Y, 2))
     return Z
 
 
 def _make_angle_gradient(X, Y, angle):
     """Generates index map for angle gradients."""
-    import numpy as np
     Z = (((180 * np.arctan2(Y, X) / np.pi) + angle) % 360) / 360
     return Z
 
 
 def _make_reflected_gradient(X, Y, angle):
     """Generates index map for reflected gradients."""
-    import numpy as np
-    theta = np.radians(angle % 360)
+    theta = np.float32(np.radians(angle % 360))
     Z = np.abs((np.cos(theta) * X - np.sin(theta) * Y))
     return Z
 
 
 def _make_diamond_gradient(X, Y, angle):
     """Generates index map for diamond gradients."""
-    import numpy as np
-    theta = np.radians(angle % 360)
+    theta = np.float32(np.radians(angle % 360))
     Z = np.abs(np.cos(theta) * X - np.sin(theta) *
                Y) + np.abs(np.sin(theta) * X + np.cos(theta) * Y)
     return Z
 
 
-def _apply_color_map(grad, Z):
-    """"""
-    import numpy as np
-    from scipy import interpolate
-    from PIL import Image
+def _make_color_map(grad):
+    """
+    Makes 256-entry color tables of the gradient for uint8 index maps.
+
+    :return: (mode, color table, alpha table or None) tuple, or None when the
+        gradient form is not supported.
+    """
 
     gradient_form = grad.get(Type.GradientForm).enum
     if gradient_form == Enum.ColorNoise:
@@ -315,7 +497,6 @@ def _apply_color_map(grad, Z):
             }
         """
         logger.debug('Noise gradient is not accurate.')
-        from scipy.ndimage.filters import maximum_filter1d, uniform_filter1d
         roughness = grad.get(
             Key.Smoothness
         ).value / 4096.  # Larger is sharper.
@@ -325,16 +506,12 @@ def _apply_color_map(grad, Z):
         mode = _COLORSPACE.get(grad.get(Key.ColorSpace).enum)
 
         rng = np.random.RandomState(seed)
-        G = rng.binomial(1, .5, (256, len(maximum))).astype(np.float)
+        G = rng.binomial(1, .5, (256, len(maximum))).astype(np.float32)
         size = max(1, int(roughness * 4))
-        G = maximum_filter1d(G, size, axis=0)
-        G = uniform_filter1d(G, size * 64, axis=0)
+        G = _maximum_filter1d(G, size)
+        G = _uniform_filter1d(G, size * 64)
         G = (2.55 * ((maximum - minimum) * G + minimum)).astype(np.uint8)
-        Z = (255 * Z).astype(np.uint8)
-        pixels = G[Z]
-        if pixels.shape[-1] == 1:
-            pixels = pixels[:, :, 0]
-        image = Image.fromarray(pixels, mode)
+        alpha_lut = None
     elif gradient_form == Enum.CustomStops:
         scalar = {
             'RGB': 1.0,
@@ -355,17 +532,8 @@ def _apply_color_map(grad, Z):
                 X.pop(), Y.pop()
             X.append(location), Y.append(color)
         assert len(X) > 0
-        if len(X) == 1:
-            X = [0., 1.]
-            Y = [Y[0], Y[0]]
-        G = interpolate.interp1d(
-            X, Y, axis=0, bounds_error=False, fill_value=(Y[0], Y[-1])
-        )
-        pixels = G(Z).astype(np.uint8)
-        if pixels.shape[-1] == 1:
-            pixels = pixels[:, :, 0]
-
-        image = Image.fromarray(pixels, mode)
+        G = _stops_to_lut(X, Y)
+        alpha_lut = None
         if Key.Transparency in grad:
             if mode in ('RGB', 'L'):
                 X, Y = [], []
@@ -377,17 +545,52 @@ def _apply_color_map(grad, Z):
                         X.pop(), Y.pop()
                     X.append(location), Y.append(opacity)
                 assert len(X) > 0
-                if len(X) == 1:
-                    X = [0., 1.]
-                    Y = [Y[0], Y[0]]
-                G = interpolate.interp1d(
-                    X, Y, axis=0, bounds_error=False, fill_value=(Y[0], Y[-1])
-                )
-                alpha = G(Z).astype(np.uint8)
-                image.putalpha(Image.fromarray(alpha, 'L'))
+                alpha_lut = _stops_to_lut(X, Y)
             else:
                 logger.warning('Alpha not supported in %s' % (mode))
     else:
         logger.error('Unknown gradient form: %s' % gradient_form)
         return None
-    return image
+    if G.shape[-1] == 1:
+        G = G[:, 0]
+    return mode, G, alpha_lut
+
+
+def _stops_to_lut(X, Y, ncolors=256):
+    """
+    Interpolates gradient stops into a uint8 lookup table.
+
+    Index maps truncate `(ncolors - 1) * v`, so entry i stands for locations
+    in [i, i + 1) / (ncolors - 1) and samples the stops at the centre.
+
+    :param X: stop locations in [0, 1].
+    :param Y: stop values, scalars or tuples of channel values.
+    :return: table of shape (ncolors, ) or (ncolors, channels).
+    """
+    X, Y = np.asarray(X), np.asarray(Y)
+    index = np.argsort(X, kind='stable')
+    X, Y = X[index], Y[index]
+    t = np.minimum((np.arange(ncolors) + .5) / (ncolors - 1), 1.)
+    if Y.ndim == 1:
+        return np.interp(t, X, Y).astype(np.uint8)
+    table = np.stack([np.interp(t, X, y) for y in Y.T], axis=-1)
+    return table.astype(np.uint8)
+
+
+def _filter1d_pad(a, size):
+    """Pads the first axis like `scipy.ndimage` filters in reflect mode."""
+    pad_width = [(size // 2, (size - 1) // 2)] + [(0, 0)] * (a.ndim - 1)
+    return np.pad(a, pad_width, mode='symmetric')
+
+
+def _maximum_filter1d(a, size):
+    """Same as `scipy.ndimage.maximum_filter1d(a, size, axis=0)`."""
+    padded = _filter1d_pad(a, size)
+    return np.max([padded[k:k + len(a)] for k in range(size)], axis=0)
+
+
+def _uniform_filter1d(a, size):
+    """Same as `scipy.ndimage.uniform_filter1d(a, size, axis=0)`."""
+    cumsum = np.cumsum(_filter1d_pad(a, size), axis=0)
+    cumsum = np.concatenate([np.zeros((1, ) + a.shape[1:], a.dtype), cumsum])
+    return (cumsum[size:size + len(a)] - cumsum[:len(a)]) / size
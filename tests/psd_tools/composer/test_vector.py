@@ -0,0 +1,344 @@
+import pytest
+import logging
+import numpy as np
+from scipy import ndimage
+
+from psd_tools import PSDImage
+from psd_tools.constants import Tag
+from psd_tools.terminology import Enum, Key, Type
+from psd_tools.composer import vector
+from psd_tools.composer.vector import (
+    draw_solid_color_fill, draw_pattern_fill, draw_gradient_fill,
+    draw_vector_mask
+)
+from psd_tools.psd.descriptor import Double
+
+from ..utils import full_name
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.mark.parametrize('filename', [
+    'path-operations/combine.psd',
+    'path-operations/exclude-first.psd',
+    'path-operations/exclude.psd',
+    'path-operations/intersect-all.psd',
+    'path-operations/intersect-first.psd',
+    'path-operations/subtract-all.psd',
+    'path-operations/subtract-first.psd',
+    'path-operations/subtract-second.psd',
+    'vector-mask.psd',
+])
+@pytest.mark.parametrize('jit', [True, False])
+def test_draw_vector_mask(filename, jit, monkeypatch):
+    if jit and vector._vector is None:
+        pytest.skip('numba is not available')
+    if not jit:
+        monkeypatch.setattr(vector, '_vector', None)
+    psd = PSDImage.open(full_name(filename))
+    for layer in psd.descendants():
+        if not layer.has_vector_mask():
+            continue
+        mask = draw_vector_mask(layer)
+        assert mask.size == (layer.width, layer.height)
+
+        # Pixels outside of the canvas stay empty.
+        bbox = (-10, -10, psd.width + 10, psd.height + 10)
+        mask = np.asarray(draw_vector_mask(layer, bbox))
+        assert mask.shape == (psd.height + 20, psd.width + 20)
+        assert not mask[:10].any() and not mask[-10:].any()
+        assert not mask[:, :10].any() and not mask[:, -10:].any()
+
+        left, top, right, bottom = layer.bbox
+        inner = mask[top + 10:bottom + 10, left + 10:right + 10].astype(int)
+        diff = inner - np.asarray(draw_vector_mask(layer))
+        assert np.abs(diff).max() <= 1
+
+
+@pytest.mark.skipif(vector.aggdraw is None, reason='aggdraw is not available')
+@pytest.mark.parametrize('filename', [
+    'path-operations/combine.psd',
+    'path-operations/exclude.psd',
+    'vector-mask.psd',
+    'masks.psd',
+    'vector-mask2.psd',
+])
+def test_draw_subpath_aggdraw(filename, monkeypatch):
+    import aggdraw
+    from PIL import Image
+    monkeypatch.setattr(vector, '_vector', None)
+    psd = PSDImage.open(full_name(filename))
+    width, height = psd.width, psd.height
+    for layer in psd.descendants():
+        if not layer.has_vector_mask():
+            continue
+        for subpath in layer.vector_mask.paths:
+            if len(subpath) <= 1:
+                continue
+            bbox = vector._clip_bbox(
+                vector._get_subpath_bbox(subpath, width, height),
+                (0, 0, width, height)
+            )
+            plane = vector._draw_subpath(subpath, width, height, bbox)
+
+            # Reference drawn on the full canvas.
+            canvas = Image.new('L', (width, height))
+            draw = aggdraw.Draw(canvas)
+            symbol = aggdraw.Symbol(
+                vector._format_symbol(subpath, width, height)
+            )
+            draw.symbol((0, 0), symbol, None, aggdraw.Brush(255))
+            draw.flush()
+            expected = np.asarray(canvas.crop(bbox)).astype(int)
+            assert np.abs(plane - expected).max() <= 1
+
+
+@pytest.mark.skipif(vector._vector is None, reason='numba is not available')
+@pytest.mark.parametrize('filename', [
+    'path-operations/combine.psd',
+    'path-operations/exclude-first.psd',
+    'path-operations/exclude.psd',
+    'path-operations/intersect-all.psd',
+    'path-operations/intersect-first.psd',
+    'path-operations/subtract-first.psd',
+    'path-operations/subtract-second.psd',
+])
+def test_draw_vector_mask_jit(filename):
+    psd = PSDImage.open(full_name(filename))
+    for layer in psd.descendants():
+        if not layer.has_vector_mask() or not layer.has_pixels():
+            continue
+        # Shape pixels hold the mask as rasterized by Photoshop.
+        expected = np.asarray(layer.topil().getchannel('A')).astype(int)
+        mask = np.asarray(draw_vector_mask(layer))
+        assert np.abs(mask - expected).mean() < 1.
+
+
+@pytest.mark.parametrize('opacity', [100., 67., 0.])
+def test_draw_solid_color_fill(opacity):
+    psd = PSDImage.open(full_name('layers-minimal/solid-color-fill.psd'))
+    setting = psd[0].tagged_blocks.get_data(Tag.SOLID_COLOR_SHEET_SETTING)
+    setting[Key.Opacity.value] = Double(opacity)
+    image = draw_solid_color_fill((50, 40), setting)
+    assert image.size == (50, 40)
+    if opacity == 100.:
+        assert not image.mode.endswith('A')
+    else:
+        expected = 255 * int(opacity) // 100
+        assert image.getchannel('A').getextrema() == (expected, expected)
+
+
+@pytest.mark.parametrize('mode', ['RGB', 'RGBA', 'L'])
+def test_apply_opacity(mode):
+    from PIL import Image
+    image = Image.new(mode, (4, 4))
+    if mode.endswith('A'):
+        image.putalpha(255)
+    assert vector._apply_opacity(image, {}) is False
+    assert image.mode == mode
+    assert vector._apply_opacity(image, {Key.Opacity: 50}) is True
+    assert image.getchannel('A').getextrema() == (127, 127)
+
+
+@pytest.mark.parametrize('filename', [
+    'layers-minimal/pattern-fill.psd',
+    'layers/pattern-fill.psb',
+])
+@pytest.mark.parametrize('size', [(100, 70), (333, 257)])
+def test_draw_pattern_fill(filename, size):
+    psd = PSDImage.open(full_name(filename))
+    setting = psd[0].tagged_blocks.get_data(Tag.PATTERN_FILL_SETTING)
+    image = draw_pattern_fill(size, psd, setting)
+    assert image.size == size
+
+    # Tiles repeat with the period of the pattern.
+    pattern_id = setting[Enum.Pattern][Key.ID].value.rstrip('\x00')
+    height, width = psd._get_pattern(pattern_id).data.rectangle[2:]
+    pixels = np.asarray(image)
+    assert np.array_equal(pixels[height:], pixels[:-height])
+    assert np.array_equal(pixels[:, width:], pixels[:, :-width])
+
+
+@pytest.fixture
+def gradient_fill():
+    psd = PSDImage.open(full_name('layers-minimal/gradient-fill.psd'))
+    return psd[0].tagged_blocks.get_data(Tag.GRADIENT_FILL_SETTING)
+
+
+@pytest.mark.parametrize('kind', [
+    Enum.Linear, Enum.Radial, Enum.Angle, Enum.Reflected, Enum.Diamond
+])
+@pytest.mark.parametrize('size', [(64, 48), (37, 91), (1, 1)])
+def test_draw_gradient_fill(gradient_fill, kind, size):
+    gradient_fill.get(Key.Type).enum = kind.value
+    for angle in (-90., 0., 33., 90., 180.):
+        gradient_fill.get(Key.Angle.value).value = angle
+        image = draw_gradient_fill(size, gradient_fill)
+        assert image.size == size
+
+
+def test_stops_to_lut():
+    lut = vector._stops_to_lut([1., 0.], [(255., 0.), (0., 255.)])
+    assert lut.shape == (256, 2) and lut.dtype == np.uint8
+    # Entries sample the centre of their index bucket.
+    assert np.array_equal(lut[:, 0], np.arange(256))
+    assert np.array_equal(lut[:-1, 1], 254 - np.arange(255))
+    assert lut[-1, 1] == 0
+
+    lut = vector._stops_to_lut([.5], [127.5])
+    assert lut.shape == (256, ) and np.all(lut == 127)
+
+    lut = vector._stops_to_lut([.25, .75], [0., 255.], ncolors=5)
+    assert lut.tolist() == [0, 63, 191, 255, 255]
+
+
+@pytest.mark.parametrize('kind', [Enum.Linear, Enum.Radial, Enum.Diamond])
+def test_draw_gradient_fill_stops(gradient_fill, kind):
+    # Red to yellow, opaque to transparent.
+    gradient_fill.get(Key.Type).enum = kind.value
+    gradient_fill[Key.Angle.value] = Double(0.)
+    color = gradient_fill.get(Key.Gradient).get(Key.Colors)[1].get(Key.Color)
+    color[b'Grn '] = Double(255.)
+    image = np.asarray(draw_gradient_fill((300, 300), gradient_fill))
+
+    # Reference interpolates the stops at the continuous index map.
+    Z = vector._make_gradient(kind, (-1., 1., 300), (-1., 1., 300), 0.)
+    Z = np.clip(Z.astype(np.float64), 0, 1)
+    expected = np.stack([
+        np.full_like(Z, 255.),
+        np.interp(Z, [0., 1.], [0., 255.]),
+        np.zeros_like(Z),
+        np.interp(Z, [0., 1.], [255., 0.]),
+    ], axis=-1)
+    diff = np.abs(image - expected)
+    assert diff.max() <= 1.
+    assert diff.mean() < .5
+
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+@pytest.mark.parametrize('size', [1, 2, 3, 4])
+def test_noise_filters(dtype, size):
+    rng = np.random.RandomState(size)
+    G = rng.binomial(1, .5, (256, 4)).astype(dtype)
+    result = vector._maximum_filter1d(G, size)
+    assert result.dtype == dtype
+    assert np.array_equal(result, ndimage.maximum_filter1d(G, size, axis=0))
+    G = result
+    result = vector._uniform_filter1d(G, size * 64)
+    assert result.dtype == dtype
+    expected = ndimage.uniform_filter1d(G, size * 64, axis=0)
+    assert np.array_equal(result, expected)
+
+
+def test_noise_color_map():
+    psd = PSDImage.open(full_name('gradient-styles.psd'))
+    count = 0
+    for layer in psd.descendants():
+        setting = layer.tagged_blocks.get_data(Tag.GRADIENT_FILL_SETTING)
+        grad = setting.get(Key.Gradient) if setting else None
+        if not grad or grad.get(Type.GradientForm).enum != Enum.ColorNoise:
+            continue
+        # Reference table as computed with scipy filters.
+        maximum = np.array([x.value for x in grad.get(Key.Maximum)])
+        minimum = np.array([x.value for x in grad.get(Key.Minimum)])
+        rng = np.random.RandomState(grad.get(Key.RandomSeed).value)
+        G = rng.binomial(1, .5, (256, len(maximum))).astype(np.float64)
+        size = max(1, int(grad.get(Key.Smoothness).value / 4096. * 4))
+        G = ndimage.maximum_filter1d(G, size, axis=0)
+        G = ndimage.uniform_filter1d(G, size * 64, axis=0)
+        expected = (2.55 * ((maximum - minimum) * G + minimum))
+        mode, color_lut, alpha_lut = vector._make_color_map(grad)
+        assert mode == 'RGB' and alpha_lut is None
+        assert np.array_equal(color_lut, expected.astype(np.uint8))
+        count += 1
+    assert count == 5
+
+
+@pytest.mark.parametrize('kind', [
+    Enum.Linear, Enum.Radial, Enum.Angle, Enum.Reflected, Enum.Diamond,
+    b'shapeburst'
+])
+def test_make_gradient_float32(kind):
+    Z = vector._make_gradient(kind, (-1., 1., 5), (-2., 2., 3), 30.)
+    assert Z.shape == (3, 5)
+    assert Z.dtype == np.float32
+
+
+def test_draw_gradient_fill_independent(gradient_fill):
+    first = draw_gradient_fill((64, 48), gradient_fill)
+    expected = np.asarray(first).copy()
+    gradient_fill.get(Key.Type).enum = Enum.Radial.value
+    second = draw_gradient_fill((64, 48), gradient_fill)
+    assert np.array_equal(np.asarray(first), expected)
+    assert not np.array_equal(np.asarray(second), expected)
+
+
+@pytest.mark.skipif(vector._vector is None, reason='numba is not available')
+@pytest.mark.parametrize('kind', [
+    Enum.Linear, Enum.Radial, Enum.Angle, Enum.Reflected, Enum.Diamond
+])
+def test_draw_gradient_fill_jit(gradient_fill, kind, monkeypatch):
+    gradient_fill.get(Key.Type).enum = kind.value
+    for angle in (-90., 0., 33., 90., 180.):
+        gradient_fill.get(Key.Angle.value).value = angle
+        expected = draw_gradient_fill((37, 91), gradient_fill)
+        with monkeypatch.context() as m:
+            m.setattr(vector, '_vector', None)
+            result = draw_gradient_fill((37, 91), gradient_fill)
+        diff = np.asarray(expected).astype(int) - np.asarray(result)
+        assert np.abs(diff).max() <= 1
+
+
+def test_draw_gradient_fill_threads(gradient_fill):
+    from concurrent.futures import ThreadPoolExecutor
+    gradient_fill.get(Key.Type).enum = Enum.Radial.value
+
+    def render(_):
+        return np.asarray(draw_gradient_fill((300, 200), gradient_fill))
+
+    expected = render(None)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(render, range(32)))
+    for result in results:
+        assert np.array_equal(result, expected)
+
+
+@pytest.fixture
+def hsb_noise_fill():
+    psd = PSDImage.open(full_name('gradient-styles.psd'))
+    layer = [layer for layer in psd.descendants()
+             if layer.name == 'Roughness 100'][0]
+    setting = layer.tagged_blocks.get_data(Tag.GRADIENT_FILL_SETTING)
+    # HSB noise has no matching image mode.
+    setting.get(Key.Gradient).get(Key.ColorSpace).enum = b'HSBC'
+    return setting
+
+
+@pytest.mark.parametrize('fill', ['gradient_fill', 'hsb_noise_fill'])
+@pytest.mark.parametrize('angle', [-90., 0., 90., 180., 270.])
+@pytest.mark.parametrize('size', [(64, 48), (1, 91), (300, 1)])
+def test_draw_gradient_fill_axis_aligned(request, fill, angle, size):
+    setting = request.getfixturevalue(fill)
+    setting.get(Key.Type).enum = Enum.Linear.value
+    setting[Key.Angle.value] = Double(angle)
+    result = draw_gradient_fill(size, setting)
+    assert result.size == size
+    # A slight tilt takes the general path.
+    setting[Key.Angle.value] = Double(angle + 1e-9)
+    expected = draw_gradient_fill(size, setting)
+    assert result.mode == expected.mode
+    diff = np.asarray(expected).astype(int) - np.asarray(result)
+    assert np.abs(diff).max() <= 1
+
+
+@pytest.mark.parametrize('filename', [
+    'gradient-styles.psd',
+    'gradient-sizes.psd',
+])
+def test_gradient_styles(filename):
+    psd = PSDImage.open(full_name(filename))
+    for artboard in psd:
+        for layer in artboard:
+            setting = layer.tagged_blocks.get_data(Tag.GRADIENT_FILL_SETTING)
+            image = draw_gradient_fill((60, 40), setting)
+            assert image.size == (60, 40)